@@ -5,11 +5,13 @@ Features: Multi-building support, unit conversion, project save/load, calculatio
 """
 
 import streamlit as st
-import json
+import orjson
 from datetime import datetime
-import base64
-import io
+from collections import deque
+import copy
+from types import MappingProxyType
 from typing import Dict, List, Tuple, Optional
+import hashlib
 import math
 
 # Version info
@@ -49,6 +51,23 @@ __changelog__ = {
     ]
 }
 
+# Changelog entries rendered as markdown once per script run
+CHANGELOG_MD = MappingProxyType({
+    version: "\n\n".join(f"• {change}" for change in changes)
+    for version, changes in __changelog__.items()
+})
+
+# Footer blocks, built once per script run
+DISCLAIMER_MD = (
+    "**⚠️ Disclaimer:** This calculator is for preliminary design purposes only. "
+    "Always consult with local authorities and verify current code requirements before finalizing any design."
+)
+FOOTER_VERSION_MD = (
+    f"**Egress Calculator v{__version__}**  \n"
+    f"Built: {__build_date__}  \n"
+    "[📚 GitHub Repository](https://github.com/hanialnaber/egress-calculator)"
+)
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="Egress & Occupant Load Calculator",
@@ -58,87 +77,179 @@ st.set_page_config(
 )
 
 # IBC Occupant Load Factors (sq. ft. per occupant)
-IBC_DATA = {
-    "2021": {
-        "Assembly (Less Concentrated)": 15,
-        "Assembly (Standing Space)": 5,
-        "Business": 150,
-        "Educational": 20,
-        "Mercantile": 60,
-        "Residential": 200
-    },
-    "2018": {
-        "Assembly (Less Concentrated)": 15,
-        "Assembly (Standing Space)": 5,
-        "Business": 150,
-        "Educational": 20,
-        "Mercantile": 60,
-        "Residential": 200
-    },
-    "2015": {
-        "Assembly (Less Concentrated)": 15,
-        "Assembly (Standing Space)": 5,
-        "Business": 100,
-        "Educational": 20,
-        "Mercantile": 60,
-        "Residential": 200
-    },
-    "2012": {
-        "Assembly (Less Concentrated)": 15,
-        "Assembly (Standing Space)": 5,
-        "Business": 100,
-        "Educational": 20,
-        "Mercantile": 60,
-        "Residential": 200
-    }
+# 2018/2021 raised the Business factor to 150; earlier editions share one table
+_FACTORS_2018_2021 = MappingProxyType({
+    "Assembly (Less Concentrated)": 15,
+    "Assembly (Standing Space)": 5,
+    "Business": 150,
+    "Educational": 20,
+    "Mercantile": 60,
+    "Residential": 200
+})
+
+_FACTORS_2012_2015 = MappingProxyType({
+    "Assembly (Less Concentrated)": 15,
+    "Assembly (Standing Space)": 5,
+    "Business": 100,
+    "Educational": 20,
+    "Mercantile": 60,
+    "Residential": 200
+})
+
+IBC_DATA = MappingProxyType({
+    "2021": _FACTORS_2018_2021,
+    "2018": _FACTORS_2018_2021,
+    "2015": _FACTORS_2012_2015,
+    "2012": _FACTORS_2012_2015
+})
+
+# Unit conversion factors
+UNIT_CONVERSION = MappingProxyType({
+    "area": MappingProxyType({"to_metric": 0.092903, "to_imperial": 10.7639}),
+    "length": MappingProxyType({"to_metric": 0.3048, "to_imperial": 3.28084}),
+    "width": MappingProxyType({"to_metric": 25.4, "to_imperial": 0.0393701})
+})
+
+# IBC Occupant Load Factors converted to sq. m per occupant
+# Each distinct table is converted once so editions keep sharing it
+_METRIC_FACTORS = {
+    id(factors): MappingProxyType({
+        occupancy: factor * UNIT_CONVERSION["area"]["to_metric"]
+        for occupancy, factor in factors.items()
+    })
+    for factors in IBC_DATA.values()
 }
+IBC_DATA_METRIC = MappingProxyType({version: _METRIC_FACTORS[id(factors)] for version, factors in IBC_DATA.items()})
+
+# Occupant load factor tables keyed by unit system
+IBC_TABLES = MappingProxyType({"imperial": IBC_DATA, "metric": IBC_DATA_METRIC})
 
 # Egress capacity factors (inches per occupant)
-EGRESS_FACTORS = {
-    "with_sprinklers": {"stairs": 0.2, "other": 0.15},
-    "without_sprinklers": {"stairs": 0.3, "other": 0.2}
-}
+EGRESS_FACTORS = MappingProxyType({
+    "with_sprinklers": MappingProxyType({"stairs": 0.2, "other": 0.15}),
+    "without_sprinklers": MappingProxyType({"stairs": 0.3, "other": 0.2})
+})
+
+# The same factors as exact (numerator, denominator) ratios for integer rounding
+EGRESS_RATIOS = MappingProxyType({
+    "with_sprinklers": MappingProxyType({"stairs": (1, 5), "other": (3, 20)}),
+    "without_sprinklers": MappingProxyType({"stairs": (3, 10), "other": (1, 5)})
+})
 
 # Area type mapping (gross vs net area)
-AREA_TYPES = {
+AREA_TYPES = MappingProxyType({
     "Assembly (Less Concentrated)": "Net",
     "Assembly (Standing Space)": "Net",
     "Business": "Gross",
     "Educational": "Net",
     "Mercantile": "Gross",
     "Residential": "Gross"
-}
+})
 
-# Unit conversion factors
-UNIT_CONVERSION = {
-    "area": {"to_metric": 0.092903, "to_imperial": 10.7639},
-    "length": {"to_metric": 0.3048, "to_imperial": 3.28084},
-    "width": {"to_metric": 25.4, "to_imperial": 0.0393701}
-}
+# Area type helper text shown for each occupancy
+AREA_TYPE_NOTES = MappingProxyType({
+    occupancy: (
+        "💡 **Net area** excludes non-occupiable spaces like mechanical rooms, stairs, and walls."
+        if area_type == "Net" else
+        "💡 **Gross area** includes the entire floor area within the exterior walls."
+    )
+    for occupancy, area_type in AREA_TYPES.items()
+})
 
 # IBC Code References
-CODE_REFERENCES = {
-    "occupant_load": {
+CODE_REFERENCES = MappingProxyType({
+    "occupant_load": MappingProxyType({
         "section": "IBC 1004",
         "description": "Occupant Load",
         "link": "https://codes.iccsafe.org/content/IBC2021P1/chapter-10-means-of-egress#IBC2021P1_Ch10_Sec1004"
-    },
-    "egress_width": {
+    }),
+    "egress_width": MappingProxyType({
         "section": "IBC 1005",
         "description": "Egress Width",
         "link": "https://codes.iccsafe.org/content/IBC2021P1/chapter-10-means-of-egress#IBC2021P1_Ch10_Sec1005"
-    },
-    "exit_access": {
+    }),
+    "exit_access": MappingProxyType({
         "section": "IBC 1017",
         "description": "Exit Access Travel Distance",
         "link": "https://codes.iccsafe.org/content/IBC2021P1/chapter-10-means-of-egress#IBC2021P1_Ch10_Sec1017"
-    },
-    "door_width": {
+    }),
+    "door_width": MappingProxyType({
         "section": "IBC 1010.1.1",
         "description": "Door Width",
         "link": "https://codes.iccsafe.org/content/IBC2021P1/chapter-10-means-of-egress#IBC2021P1_Ch10_Sec1010.1.1"
-    }
-}
+    })
+})
+
+# Code reference links rendered as markdown once per script run
+CODE_REFERENCE_MD = MappingProxyType({
+    key: f"**[{ref['section']}]({ref['link']})** - {ref['description']}"
+    for key, ref in CODE_REFERENCES.items()
+})
+
+# Links to each IBC edition, rendered as markdown once per script run
+IBC_CODE_LINKS = MappingProxyType({
+    "2021": "https://codes.iccsafe.org/content/IBC2021P1",
+    "2018": "https://codes.iccsafe.org/content/IBC2018P1",
+    "2015": "https://codes.iccsafe.org/content/IBC2015P1",
+    "2012": "https://codes.iccsafe.org/content/IBC2012P1"
+})
+IBC_CODE_LINK_MD = MappingProxyType({
+    version: f"**📖 [View {version} IBC Code]({link})**"
+    for version, link in IBC_CODE_LINKS.items()
+})
+
+# Step-by-step calculation templates, filled in by generate_step_by_step_calculation
+CALCULATION_STEP_TEMPLATES = (
+    MappingProxyType({
+        'title': 'Determine Occupant Load Factor',
+        'description': "Based on {ibc_version} IBC Table 1004.5",
+        'calculation': "Occupancy: {occupancy}",
+        'formula': "Factor = {base_factor} sq. ft./occupant",
+        'result': "{occupant_load_factor:.2f} {area_units}/occupant",
+        'note': "Using {area_type} area as specified by IBC for this occupancy type"
+    }),
+    MappingProxyType({
+        'title': 'Calculate Occupant Load',
+        'description': "Apply IBC Section 1004.3 - occupant load calculation",
+        'calculation': "Floor Area ÷ Occupant Load Factor",
+        'formula': "{floor_area:,} {area_units} ÷ {occupant_load_factor:.2f} {area_units}/occupant",
+        'result': "{raw_occupant_load:.2f} = {occupant_load} occupants (rounded up)",
+        'note': "Always round UP to the next whole number per IBC requirements"
+    }),
+    MappingProxyType({
+        'title': 'Determine Egress Capacity Factors',
+        'description': "Based on IBC Section 1005.3.1 - {sprinkler_status}",
+        'calculation': "Building has {sprinkler_system}",
+        'formula': "Stairs: {stair_factor} inches/occupant\nOther components: {other_factor} inches/occupant",
+        'result': "Using {sprinkler_status} factors",
+        'note': "Sprinkler systems allow for reduced egress width requirements"
+    }),
+    MappingProxyType({
+        'title': 'Calculate Required Stair Width',
+        'description': "Apply IBC Section 1005.3.1 for stair capacity",
+        'calculation': "Occupant Load × Stair Factor",
+        'formula': "{occupant_load} occupants × {stair_factor} inches/occupant",
+        'result': "{raw_stair_width:.1f} = {stair_width} {width_units} (rounded up)",
+        'note': "Minimum stair width is typically 44 inches per IBC Section 1011.2"
+    }),
+    MappingProxyType({
+        'title': 'Calculate Required Width for Other Components',
+        'description': "Apply IBC Section 1005.3.1 for doors, corridors, etc.",
+        'calculation': "Occupant Load × Other Components Factor",
+        'formula': "{occupant_load} occupants × {other_factor} inches/occupant",
+        'result': "{raw_other_width:.1f} = {other_width} {width_units} (rounded up)",
+        'note': "This applies to doors, corridors, ramps, and other egress components"
+    })
+)
+
+DOOR_WIDTH_STEP_TEMPLATE = MappingProxyType({
+    'title': 'Calculate Individual Door Width',
+    'description': "Distribute total egress width among exit doors",
+    'calculation': "Total Required Width ÷ Number of Doors",
+    'formula': "{other_width} {width_units} ÷ {exit_doors} doors",
+    'result': "{calculated_width} {width_units} (minimum {min_door_width} inches per IBC 1010.1.1)",
+    'note': "Final door width: {door_width} {width_units} (takes maximum of calculated and minimum)"
+})
 
 # US States and Jurisdictions
 JURISDICTIONS = {
@@ -403,21 +514,27 @@ JURISDICTIONS = {
     }
 }
 
+# Selectbox options (built once per script run)
+STATE_OPTIONS = ("",) + tuple(JURISDICTIONS)
+IBC_VERSIONS = tuple(IBC_DATA)
+IBC_VERSION_OPTIONS = ("",) + IBC_VERSIONS
+OCCUPANCY_OPTIONS = ("",) + tuple(AREA_TYPES)
+
+# Session state defaults (mutable values are copied so sessions never share them)
+SESSION_DEFAULTS = MappingProxyType({
+    'current_units': 'imperial',
+    'buildings': [],
+    'current_building_index': 0,
+    'project_name': '',
+    'calculation_history': deque(maxlen=50),
+    'show_advanced': False
+})
+
 # Initialize session state
 def init_session_state():
     """Initialize Streamlit session state with default values"""
-    if 'current_units' not in st.session_state:
-        st.session_state.current_units = 'imperial'
-    if 'buildings' not in st.session_state:
-        st.session_state.buildings = []
-    if 'current_building_index' not in st.session_state:
-        st.session_state.current_building_index = 0
-    if 'project_name' not in st.session_state:
-        st.session_state.project_name = ''
-    if 'calculation_history' not in st.session_state:
-        st.session_state.calculation_history = []
-    if 'show_advanced' not in st.session_state:
-        st.session_state.show_advanced = False
+    for key in SESSION_DEFAULTS.keys() - st.session_state.keys():
+        st.session_state[key] = copy.copy(SESSION_DEFAULTS[key])
 
 def convert_units(value: float, conversion_type: str, direction: str) -> float:
     """Convert value between imperial and metric units"""
@@ -429,12 +546,7 @@ def convert_units(value: float, conversion_type: str, direction: str) -> float:
 
 def get_area_factor(ibc_version: str, occupancy: str, units: str = 'imperial') -> float:
     """Get area factor adjusted for current units"""
-    factor = IBC_DATA[ibc_version][occupancy]
-    
-    if units == 'metric':
-        factor = factor * UNIT_CONVERSION["area"]["to_metric"]
-    
-    return factor
+    return IBC_TABLES[units][ibc_version][occupancy]
 
 def calculate_occupant_load(area: float, factor: float) -> int:
     """Calculate occupant load"""
@@ -442,17 +554,17 @@ def calculate_occupant_load(area: float, factor: float) -> int:
 
 def calculate_egress_widths(occupant_load: int, has_sprinklers: bool) -> Dict[str, int]:
     """Calculate egress width requirements"""
-    factors = EGRESS_FACTORS["with_sprinklers"] if has_sprinklers else EGRESS_FACTORS["without_sprinklers"]
+    ratios = EGRESS_RATIOS["with_sprinklers"] if has_sprinklers else EGRESS_RATIOS["without_sprinklers"]
     
+    # Ceiling division on integers: -(-a // b) == ceil(a / b)
     return {
-        "stairs": math.ceil(occupant_load * factors["stairs"]),
-        "other": math.ceil(occupant_load * factors["other"])
+        "stairs": -(-occupant_load * ratios["stairs"][0] // ratios["stairs"][1]),
+        "other": -(-occupant_load * ratios["other"][0] // ratios["other"][1])
     }
 
-def calculate_door_width(occupant_load: int, num_exits: int, has_sprinklers: bool) -> int:
-    """Calculate minimum door width per exit"""
-    total_width = calculate_egress_widths(occupant_load, has_sprinklers)["other"]
-    width_per_door = math.ceil(total_width / num_exits)
+def calculate_door_width(total_width: int, num_exits: int) -> int:
+    """Calculate minimum door width per exit from the total other-components width"""
+    width_per_door = -(-total_width // num_exits)
     return max(width_per_door, 32)  # IBC minimum is 32 inches
 
 def format_width(value: int, units: str = 'imperial') -> str:
@@ -467,6 +579,7 @@ def format_area(value: float, units: str = 'imperial') -> str:
     unit_str = "sq. m" if units == 'metric' else "sq. ft."
     return f"{value:,.2f} {unit_str}"
 
+@st.cache_data(max_entries=64, show_spinner=False)
 def generate_code_notice(state: str, jurisdiction: str = None) -> str:
     """Generate jurisdiction-specific notice"""
     if state and state in JURISDICTIONS:
@@ -493,17 +606,26 @@ def generate_code_notice(state: str, jurisdiction: str = None) -> str:
         **Always verify local and state-specific amendments** before finalizing any design.
         """
 
-def generate_calculation_summary(inputs: Dict, results: Dict) -> str:
-    """Generate detailed calculation summary"""
-    units = st.session_state.current_units
+def results_fingerprint(results: Dict) -> str:
+    """Return a content hash identifying a set of calculation results"""
+    return hashlib.sha1(orjson.dumps(results, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def generate_calculation_summary(results_key: str, _results: Dict, units: str, project_name: str,
+                                 building_number: int, building_count: int) -> str:
+    """Generate detailed calculation summary (cached by results_key rather than by hashing _results)"""
+    results = _results
+    inputs = results['inputs']
     area_units = "sq. m" if units == 'metric' else "sq. ft."
     width_units = "mm" if units == 'metric' else "inches"
+    calculated_at = datetime.fromisoformat(results['calculated_at']) if results.get('calculated_at') else datetime.now()
+    factors = EGRESS_FACTORS["with_sprinklers" if inputs['has_sprinklers'] else "without_sprinklers"]
     
-    summary = f"""
+    parts = [f"""
 **PROJECT SUMMARY**
-Project: {st.session_state.project_name or 'Untitled Project'}
-Building: {st.session_state.current_building_index + 1} of {len(st.session_state.buildings)}
-Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Project: {project_name or 'Untitled Project'}
+Building: {building_number} of {building_count}
+Date: {calculated_at.strftime('%Y-%m-%d %H:%M:%S')}
 Units: {units.title()}
 
 **INPUT PARAMETERS**
@@ -514,130 +636,92 @@ Units: {units.title()}
 • Floor Area: {inputs['floor_area']:,} {area_units}
 • Occupant Load Factor: {inputs['occupant_load_factor']:.2f} {area_units}/occupant
 • Automatic Sprinkler System: {'Yes' if inputs['has_sprinklers'] else 'No'}
-"""
+"""]
     
     if inputs.get('travel_distance'):
         distance_units = "m" if units == 'metric' else "ft"
-        summary += f"• Max Travel Distance: {inputs['travel_distance']} {distance_units}\n"
+        parts.append(f"• Max Travel Distance: {inputs['travel_distance']} {distance_units}\n")
     
     if inputs.get('exit_doors'):
-        summary += f"• Number of Exit Doors: {inputs['exit_doors']}\n"
+        parts.append(f"• Number of Exit Doors: {inputs['exit_doors']}\n")
     
-    summary += f"""
+    parts.append(f"""
 **CALCULATION PROCESS**
 1. Occupant Load = ceil({inputs['floor_area']:,} ÷ {inputs['occupant_load_factor']:.2f}) = {results['occupant_load']} occupants
-2. Stair Width = {results['occupant_load']} × {0.2 if inputs['has_sprinklers'] else 0.3} = {results['egress_widths']['stairs']} {width_units}
-3. Other Components Width = {results['occupant_load']} × {0.15 if inputs['has_sprinklers'] else 0.2} = {results['egress_widths']['other']} {width_units}
-"""
+2. Stair Width = {results['occupant_load']} × {factors['stairs']} = {results['egress_widths']['stairs']} {width_units}
+3. Other Components Width = {results['occupant_load']} × {factors['other']} = {results['egress_widths']['other']} {width_units}
+""")
     
     if results.get('door_width'):
-        summary += f"4. Door Width (per door) = {results['total_width']} ÷ {inputs['exit_doors']} = {results['door_width']} {width_units}\n"
+        parts.append(f"4. Door Width (per door) = {results['total_width']} ÷ {inputs['exit_doors']} = {results['door_width']} {width_units}\n")
     
-    summary += f"""
+    parts.append(f"""
 **RESULTS**
 • Occupant Load: {results['occupant_load']} occupants
 • Required Stair Width: {format_width(results['egress_widths']['stairs'], units)}
 • Required Other Components Width: {format_width(results['egress_widths']['other'], units)}
-"""
+""")
     
     if results.get('door_width'):
-        summary += f"• Minimum Door Width: {format_width(results['door_width'], units)}\n"
-        summary += f"• Total Required Exit Width: {format_width(results['total_width'], units)}\n"
+        parts.append(f"• Minimum Door Width: {format_width(results['door_width'], units)}\n")
+        parts.append(f"• Total Required Exit Width: {format_width(results['total_width'], units)}\n")
     
-    return summary
+    return "".join(parts)
 
-def generate_step_by_step_calculation(inputs: Dict, results: Dict) -> List[Dict]:
-    """Generate detailed step-by-step calculation breakdown"""
-    units = st.session_state.current_units
-    area_units = "sq. m" if units == 'metric' else "sq. ft."
-    width_units = "mm" if units == 'metric' else "inches"
-    
-    steps = []
-    
-    # Step 1: Occupant Load Factor Selection
-    area_type = AREA_TYPES[inputs['occupancy']]
-    base_factor = IBC_DATA[inputs['ibc_version']][inputs['occupancy']]
-    
-    steps.append({
-        'step': 1,
-        'title': 'Determine Occupant Load Factor',
-        'description': f"Based on {inputs['ibc_version']} IBC Table 1004.5",
-        'calculation': f"Occupancy: {inputs['occupancy']}",
-        'formula': f"Factor = {base_factor} sq. ft./occupant",
-        'result': f"{inputs['occupant_load_factor']:.2f} {area_units}/occupant",
-        'note': f"Using {area_type} area as specified by IBC for this occupancy type"
-    })
-    
-    # Step 2: Occupant Load Calculation
-    steps.append({
-        'step': 2,
-        'title': 'Calculate Occupant Load',
-        'description': "Apply IBC Section 1004.3 - occupant load calculation",
-        'calculation': f"Floor Area ÷ Occupant Load Factor",
-        'formula': f"{inputs['floor_area']:,} {area_units} ÷ {inputs['occupant_load_factor']:.2f} {area_units}/occupant",
-        'result': f"{inputs['floor_area'] / inputs['occupant_load_factor']:.2f} = {results['occupant_load']} occupants (rounded up)",
-        'note': "Always round UP to the next whole number per IBC requirements"
-    })
+@st.cache_data(max_entries=64, show_spinner=False)
+def generate_step_by_step_calculation(results_key: str, _results: Dict, units: str) -> List[Dict]:
+    """Generate detailed step-by-step calculation breakdown (cached by results_key)"""
+    results = _results
+    inputs = results['inputs']
+    occupancy = inputs['occupancy']
+    ibc_version = inputs['ibc_version']
+    has_sprinklers = inputs['has_sprinklers']
+    occupant_load = results['occupant_load']
+    egress_widths = results['egress_widths']
+    stair_factor, other_factor = EGRESS_FACTORS["with_sprinklers" if has_sprinklers else "without_sprinklers"].values()
     
-    # Step 3: Egress Capacity Factors
-    stair_factor = 0.2 if inputs['has_sprinklers'] else 0.3
-    other_factor = 0.15 if inputs['has_sprinklers'] else 0.2
-    sprinkler_status = "with sprinklers" if inputs['has_sprinklers'] else "without sprinklers"
-    
-    steps.append({
-        'step': 3,
-        'title': 'Determine Egress Capacity Factors',
-        'description': f"Based on IBC Section 1005.3.1 - {sprinkler_status}",
-        'calculation': f"Building has {'automatic sprinkler system' if inputs['has_sprinklers'] else 'no sprinkler system'}",
-        'formula': f"Stairs: {stair_factor} inches/occupant\nOther components: {other_factor} inches/occupant",
-        'result': f"Using {sprinkler_status} factors",
-        'note': "Sprinkler systems allow for reduced egress width requirements"
-    })
-    
-    # Step 4: Stair Width Calculation
-    steps.append({
-        'step': 4,
-        'title': 'Calculate Required Stair Width',
-        'description': "Apply IBC Section 1005.3.1 for stair capacity",
-        'calculation': f"Occupant Load × Stair Factor",
-        'formula': f"{results['occupant_load']} occupants × {stair_factor} inches/occupant",
-        'result': f"{results['occupant_load'] * stair_factor:.1f} = {results['egress_widths']['stairs']} {width_units} (rounded up)",
-        'note': "Minimum stair width is typically 44 inches per IBC Section 1011.2"
-    })
-    
-    # Step 5: Other Components Width Calculation
-    steps.append({
-        'step': 5,
-        'title': 'Calculate Required Width for Other Components',
-        'description': "Apply IBC Section 1005.3.1 for doors, corridors, etc.",
-        'calculation': f"Occupant Load × Other Components Factor",
-        'formula': f"{results['occupant_load']} occupants × {other_factor} inches/occupant",
-        'result': f"{results['occupant_load'] * other_factor:.1f} = {results['egress_widths']['other']} {width_units} (rounded up)",
-        'note': "This applies to doors, corridors, ramps, and other egress components"
-    })
+    values = {
+        'ibc_version': ibc_version,
+        'occupancy': occupancy,
+        'area_type': AREA_TYPES[occupancy],
+        'base_factor': IBC_DATA[ibc_version][occupancy],
+        'area_units': "sq. m" if units == 'metric' else "sq. ft.",
+        'width_units': "mm" if units == 'metric' else "inches",
+        'floor_area': inputs['floor_area'],
+        'occupant_load_factor': inputs['occupant_load_factor'],
+        'raw_occupant_load': inputs['floor_area'] / inputs['occupant_load_factor'],
+        'occupant_load': occupant_load,
+        'sprinkler_status': "with sprinklers" if has_sprinklers else "without sprinklers",
+        'sprinkler_system': 'automatic sprinkler system' if has_sprinklers else 'no sprinkler system',
+        'stair_factor': stair_factor,
+        'other_factor': other_factor,
+        'raw_stair_width': occupant_load * stair_factor,
+        'raw_other_width': occupant_load * other_factor,
+        'stair_width': egress_widths['stairs'],
+        'other_width': egress_widths['other']
+    }
+    templates = CALCULATION_STEP_TEMPLATES
     
-    # Step 6: Door Width Calculation (if advanced)
+    # Step 6 only applies when door widths were calculated (advanced options)
     if results.get('door_width') and inputs.get('exit_doors'):
-        min_door_width = 32  # IBC minimum
-        calculated_width = math.ceil(results['egress_widths']['other'] / inputs['exit_doors'])
-        
-        steps.append({
-            'step': 6,
-            'title': 'Calculate Individual Door Width',
-            'description': "Distribute total egress width among exit doors",
-            'calculation': f"Total Required Width ÷ Number of Doors",
-            'formula': f"{results['egress_widths']['other']} {width_units} ÷ {inputs['exit_doors']} doors",
-            'result': f"{calculated_width} {width_units} (minimum {min_door_width} inches per IBC 1010.1.1)",
-            'note': f"Final door width: {results['door_width']} {width_units} (takes maximum of calculated and minimum)"
+        values.update({
+            'exit_doors': inputs['exit_doors'],
+            'calculated_width': -(-egress_widths['other'] // inputs['exit_doors']),
+            'min_door_width': 32,  # IBC minimum
+            'door_width': results['door_width']
         })
+        templates += (DOOR_WIDTH_STEP_TEMPLATE,)
     
-    return steps
+    return [
+        {'step': number, **{field: text.format_map(values) for field, text in template.items()}}
+        for number, template in enumerate(templates, 1)
+    ]
 
-def save_to_history(results: Dict):
+def save_to_history(results: Dict, now: datetime):
     """Save calculation to history"""
     history_item = {
-        'id': datetime.now().timestamp(),
-        'date': datetime.now().isoformat(),
+        'id': now.timestamp(),
+        'date': now.isoformat(),
         'project_name': st.session_state.project_name or 'Untitled Project',
         'building_index': st.session_state.current_building_index + 1,
         'inputs': results['inputs'],
@@ -651,21 +735,65 @@ def save_to_history(results: Dict):
         'units': st.session_state.current_units
     }
     
-    st.session_state.calculation_history.insert(0, history_item)
+    # History is capped at 50 items; the deque drops the oldest entry itself
+    st.session_state.calculation_history.appendleft(history_item)
+
+# Sidebar button callbacks: on_click runs before the rerun, so no st.rerun() is needed
+def toggle_units():
+    """Switch between imperial and metric units"""
+    st.session_state.current_units = 'metric' if st.session_state.current_units == 'imperial' else 'imperial'
+
+def add_building():
+    """Append a new building and make it current"""
+    st.session_state.buildings.append({
+        'id': datetime.now().timestamp(),
+        'name': f"Building {len(st.session_state.buildings) + 1}",
+        'inputs': {},
+        'results': None
+    })
+    st.session_state.current_building_index = len(st.session_state.buildings) - 1
+
+def previous_building():
+    """Move to the previous building"""
+    if st.session_state.current_building_index > 0:
+        st.session_state.current_building_index -= 1
+
+def next_building():
+    """Move to the next building"""
+    if st.session_state.current_building_index < len(st.session_state.buildings) - 1:
+        st.session_state.current_building_index += 1
+
+def new_project():
+    """Clear all buildings and the project name"""
+    st.session_state.buildings = []
+    st.session_state.current_building_index = 0
+    st.session_state.project_name = ""
+
+def build_project_export(project_name: str, buildings: List[Dict], now: datetime) -> bytes:
+    """Serialize project data for export, stamped with the given time"""
+    project_data = {
+        'name': project_name or 'Untitled Project',
+        'buildings': buildings,
+        'created_date': now.isoformat(),
+        'version': __version__,
+        'app_version': __version__,
+        'exported_by': f"Egress Calculator v{__version__}"
+    }
     
-    # Limit history to 50 items
-    if len(st.session_state.calculation_history) > 50:
-        st.session_state.calculation_history = st.session_state.calculation_history[:50]
+    return orjson.dumps(project_data, option=orjson.OPT_INDENT_2)
 
-def create_download_link(data: str, filename: str, text: str) -> str:
-    """Create a download link for data"""
-    b64 = base64.b64encode(data.encode()).decode()
-    return f'<a href="data:file/txt;base64,{b64}" download="{filename}">{text}</a>'
+@st.cache_data(max_entries=8, show_spinner=False)
+def parse_project_file(raw: bytes) -> Dict:
+    """Parse uploaded project JSON"""
+    return orjson.loads(raw)
 
 def main():
     """Main application function"""
     init_session_state()
     
+    # Export stamp: names the project file and fills its created_date
+    now = datetime.now()
+    
     # Header
     st.title("🏗️ Egress & Occupant Load Calculator")
     col1, col2 = st.columns([3, 1])
@@ -691,9 +819,7 @@ def main():
         # Units toggle
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("🔄 Toggle Units"):
-                st.session_state.current_units = 'metric' if st.session_state.current_units == 'imperial' else 'imperial'
-                st.rerun()
+            st.button("🔄 Toggle Units", on_click=toggle_units)
         
         with col2:
             st.write(f"**Units:** {st.session_state.current_units.title()}")
@@ -704,15 +830,7 @@ def main():
         st.subheader("🏢 Buildings")
         
         if not st.session_state.buildings:
-            if st.button("➕ Add First Building"):
-                st.session_state.buildings.append({
-                    'id': datetime.now().timestamp(),
-                    'name': f"Building 1",
-                    'inputs': {},
-                    'results': None
-                })
-                st.session_state.current_building_index = 0
-                st.rerun()
+            st.button("➕ Add First Building", on_click=add_building)
         else:
             # Building counter and navigation
             total_buildings = len(st.session_state.buildings)
@@ -722,25 +840,13 @@ def main():
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                if st.button("⬅️") and st.session_state.current_building_index > 0:
-                    st.session_state.current_building_index -= 1
-                    st.rerun()
+                st.button("⬅️", on_click=previous_building)
             
             with col2:
-                if st.button("➕ Add"):
-                    st.session_state.buildings.append({
-                        'id': datetime.now().timestamp(),
-                        'name': f"Building {len(st.session_state.buildings) + 1}",
-                        'inputs': {},
-                        'results': None
-                    })
-                    st.session_state.current_building_index = len(st.session_state.buildings) - 1
-                    st.rerun()
+                st.button("➕ Add", on_click=add_building)
             
             with col3:
-                if st.button("➡️") and st.session_state.current_building_index < len(st.session_state.buildings) - 1:
-                    st.session_state.current_building_index += 1
-                    st.rerun()
+                st.button("➡️", on_click=next_building)
         
         st.divider()
         
@@ -749,40 +855,29 @@ def main():
         
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("🆕 New Project"):
-                st.session_state.buildings = []
-                st.session_state.current_building_index = 0
-                st.session_state.project_name = ""
-                st.rerun()
+            st.button("🆕 New Project", on_click=new_project)
         
         with col2:
             # Export project
             if st.session_state.buildings:
-                project_data = {
-                    'name': st.session_state.project_name or 'Untitled Project',
-                    'buildings': st.session_state.buildings,
-                    'created_date': datetime.now().isoformat(),
-                    'version': __version__,
-                    'app_version': __version__,
-                    'exported_by': f"Egress Calculator v{__version__}"
-                }
-                
-                project_json = json.dumps(project_data, indent=2)
+                project_json = build_project_export(st.session_state.project_name, st.session_state.buildings, now)
                 st.download_button(
                     label="📥 Export Project",
                     data=project_json,
-                    file_name=f"egress_project_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    file_name=f"egress_project_{now.strftime('%Y%m%d_%H%M%S')}.json",
                     mime="application/json"
                 )
         
         # Import project
         uploaded_file = st.file_uploader("📤 Import Project", type=['json'])
-        if uploaded_file:
+        # The uploader keeps its file across reruns, so only load each upload once
+        if uploaded_file and uploaded_file.file_id != st.session_state.get('imported_file_id'):
             try:
-                project_data = json.load(uploaded_file)
+                project_data = parse_project_file(uploaded_file.getvalue())
                 st.session_state.project_name = project_data['name']
                 st.session_state.buildings = project_data['buildings']
                 st.session_state.current_building_index = 0
+                st.session_state.imported_file_id = uploaded_file.file_id
                 st.success(f"Project '{project_data['name']}' loaded successfully!")
                 st.rerun()
             except Exception as e:
@@ -798,23 +893,39 @@ def main():
             st.markdown(f"**Version:** {__version__}")
             st.markdown(f"**Build Date:** {__build_date__}")
             
-            if __version__ in __changelog__:
-                st.markdown("**What's New:**")
-                for change in __changelog__[__version__]:
-                    st.markdown(f"• {change}")
+            if __version__ in CHANGELOG_MD:
+                st.markdown(f"**What's New:**\n\n{CHANGELOG_MD[__version__]}")
             
             st.markdown("**Previous Versions:**")
-            for version, changes in __changelog__.items():
+            for version, changes_md in CHANGELOG_MD.items():
                 if version != __version__:
                     with st.expander(f"Version {version}", expanded=False):
-                        for change in changes:
-                            st.markdown(f"• {change}")
+                        st.markdown(changes_md)
     
     # Main content area
     if not st.session_state.buildings:
         st.info("👆 Click 'Add First Building' in the sidebar to get started!")
         return
     
+    render_calculator()
+    
+    # Footer
+    st.divider()
+    footer_col1, footer_col2 = st.columns([2, 1])
+    
+    with footer_col1:
+        st.markdown(DISCLAIMER_MD)
+    
+    with footer_col2:
+        st.markdown(FOOTER_VERSION_MD)
+
+@st.fragment
+def render_calculator():
+    """Render building inputs and results; widget changes here rerun only this fragment"""
+    buildings = st.session_state.buildings
+    building_index = st.session_state.current_building_index
+    current_building = buildings[building_index] if building_index < len(buildings) else None
+    
     # Current building inputs
     st.header("📊 Project Parameters")
     
@@ -829,7 +940,7 @@ def main():
         # State selection
         state = st.selectbox(
             "State",
-            options=[""] + list(JURISDICTIONS.keys()),
+            options=STATE_OPTIONS,
             index=0,
             help="Select the state for code compliance"
         )
@@ -837,10 +948,9 @@ def main():
         # Jurisdiction selection (dynamic based on selected state)
         jurisdiction = None
         if state and state in JURISDICTIONS:
-            jurisdiction_options = [""] + list(JURISDICTIONS[state]["local_jurisdictions"].keys())
             jurisdiction = st.selectbox(
                 f"{state} Jurisdiction",
-                options=jurisdiction_options,
+                options=("",) + tuple(JURISDICTIONS[state]["local_jurisdictions"]),
                 index=0,
                 help=f"Select your specific city or jurisdiction within {state}",
                 key=f"{state}_jurisdiction"
@@ -868,8 +978,8 @@ def main():
                 recommended_version = JURISDICTIONS[state]["local_jurisdictions"][jurisdiction]["code_version"]
                 ibc_version = st.selectbox(
                     "IBC Code Version",
-                    options=["2021", "2018", "2015", "2012"],
-                    index=["2021", "2018", "2015", "2012"].index(recommended_version) if recommended_version in ["2021", "2018", "2015", "2012"] else 0,
+                    options=IBC_VERSIONS,
+                    index=IBC_VERSIONS.index(recommended_version) if recommended_version in IBC_VERSIONS else 0,
                     help=f"⚠️ Note: {jurisdiction} officially uses {recommended_version} IBC"
                 )
                 
@@ -878,14 +988,14 @@ def main():
         else:
             ibc_version = st.selectbox(
                 "IBC Code Version",
-                options=["", "2021", "2018", "2015", "2012"],
+                options=IBC_VERSION_OPTIONS,
                 index=0,
                 help="Select the International Building Code version"
             )
         
         occupancy = st.selectbox(
             "Occupancy Classification",
-            options=[""] + list(AREA_TYPES.keys()),
+            options=OCCUPANCY_OPTIONS,
             index=0,
             help="Select the building occupancy type"
         )
@@ -908,11 +1018,7 @@ def main():
         
         # Show area type helper
         if occupancy:
-            area_type = AREA_TYPES[occupancy]
-            if area_type == "Net":
-                st.info("💡 **Net area** excludes non-occupiable spaces like mechanical rooms, stairs, and walls.")
-            else:
-                st.info("💡 **Gross area** includes the entire floor area within the exterior walls.")
+            st.info(AREA_TYPE_NOTES[occupancy])
     
     # Jurisdiction Information Section (if state and jurisdiction are selected)
     if state and jurisdiction and jurisdiction in JURISDICTIONS[state]["local_jurisdictions"]:
@@ -927,20 +1033,12 @@ def main():
             st.markdown(f"**Authority Having Jurisdiction:** {jurisdiction_info['authority']}")
         
         with info_col2:
-            st.markdown("**Local Amendments:**")
-            for amendment in jurisdiction_info['amendments']:
-                st.markdown(f"• {amendment}")
+            st.markdown("\n\n".join(["**Local Amendments:**"] + [f"• {amendment}" for amendment in jurisdiction_info['amendments']]))
             
             # IBC Link
-            ibc_links = {
-                "2021": "https://codes.iccsafe.org/content/IBC2021P1",
-                "2018": "https://codes.iccsafe.org/content/IBC2018P1", 
-                "2015": "https://codes.iccsafe.org/content/IBC2015P1",
-                "2012": "https://codes.iccsafe.org/content/IBC2012P1"
-            }
-            
-            if jurisdiction_info['code_version'] in ibc_links:
-                st.markdown(f"**📖 [View {jurisdiction_info['code_version']} IBC Code]({ibc_links[jurisdiction_info['code_version']]})**")
+            ibc_link_md = IBC_CODE_LINK_MD.get(jurisdiction_info['code_version'])
+            if ibc_link_md:
+                st.markdown(ibc_link_md)
             
             st.markdown(f"**🌐 [Local Authority Website]({jurisdiction_info['website']})**")
     
@@ -969,12 +1067,8 @@ def main():
     
     # Calculate button
     if st.button("🧮 Calculate Egress Requirements", type="primary", use_container_width=True):
-        # Validation
-        validation_fields = [ibc_version, occupancy, floor_area > 0, has_sprinklers]
-        if state:
-            validation_fields.append(jurisdiction)
-        
-        if not all(validation_fields):
+        # Validation (a jurisdiction is only required once a state is chosen)
+        if not (ibc_version and occupancy and floor_area > 0 and has_sprinklers and (jurisdiction or not state)):
             if state and not jurisdiction:
                 st.error(f"❌ Please select a {state} jurisdiction!")
             else:
@@ -983,6 +1077,7 @@ def main():
         
         try:
             # Get values
+            now = datetime.now()
             has_sprinklers_bool = has_sprinklers == "Yes"
             
             # Get area factor adjusted for units
@@ -997,7 +1092,7 @@ def main():
             total_width = None
             
             if st.session_state.show_advanced and exit_doors > 0:
-                door_width = calculate_door_width(occupant_load, int(exit_doors), has_sprinklers_bool)
+                door_width = calculate_door_width(egress_widths["other"], int(exit_doors))
                 total_width = egress_widths["other"]
             
             # Prepare results
@@ -1006,6 +1101,7 @@ def main():
                 'egress_widths': egress_widths,
                 'door_width': door_width,
                 'total_width': total_width,
+                'calculated_at': now.isoformat(),
                 'inputs': {
                     'state': state,
                     'jurisdiction': jurisdiction if state else None,
@@ -1020,26 +1116,29 @@ def main():
             }
             
             # Save results to current building
-            if st.session_state.buildings:
-                st.session_state.buildings[st.session_state.current_building_index]['results'] = results
-                st.session_state.buildings[st.session_state.current_building_index]['inputs'] = results['inputs']
+            if current_building is not None:
+                current_building['results'] = results
+                current_building['inputs'] = results['inputs']
             
             # Save to history
-            save_to_history(results)
-            
-            # Display results
-            st.success("✅ Calculation completed successfully!")
+            save_to_history(results, now)
             
         except Exception as e:
             st.error(f"❌ Calculation error: {str(e)}")
             return
+        
+        # Rerun the whole app so the sidebar export picks up the new results
+        st.session_state.calculation_completed = True
+        st.rerun()
+    
+    if st.session_state.pop('calculation_completed', False):
+        st.success("✅ Calculation completed successfully!")
     
     # Display results if available
-    if (st.session_state.buildings and 
-        st.session_state.current_building_index < len(st.session_state.buildings) and
-        st.session_state.buildings[st.session_state.current_building_index].get('results')):
-        
-        results = st.session_state.buildings[st.session_state.current_building_index]['results']
+    if current_building and current_building.get('results'):
+        results = current_building['results']
+        # Hash the results once; the cached generators below are keyed on it
+        results_key = results_fingerprint(results)
         
         st.header("📋 Calculation Results")
         
@@ -1082,27 +1181,26 @@ def main():
         
         # Step-by-step calculation breakdown
         with st.expander("🔍 Step-by-Step Calculation Process", expanded=False):
-            steps = generate_step_by_step_calculation(results['inputs'], results)
+            steps = generate_step_by_step_calculation(results_key, results, st.session_state.current_units)
             
             for step in steps:
-                st.markdown(f"### Step {step['step']}: {step['title']}")
+                # Steps after the first open with a rule in place of a separate st.divider
+                separator = "---\n\n" if step['step'] > 1 else ""
+                st.markdown(f"{separator}### Step {step['step']}: {step['title']}")
                 
                 # Create columns for better layout
                 step_col1, step_col2 = st.columns([3, 2])
                 
                 with step_col1:
-                    st.markdown(f"**Description:** {step['description']}")
-                    st.markdown(f"**Calculation:** {step['calculation']}")
+                    st.markdown(f"**Description:** {step['description']}\n\n**Calculation:** {step['calculation']}")
                     if step.get('formula'):
                         st.code(step['formula'], language='text')
                 
                 with step_col2:
-                    st.markdown(f"**Result:** {step['result']}")
+                    result_md = f"**Result:** {step['result']}"
                     if step.get('note'):
-                        st.info(f"💡 {step['note']}")
-                
-                if step['step'] < len(steps):
-                    st.divider()
+                        result_md += f"\n\n> 💡 {step['note']}"
+                    st.markdown(result_md)
         
         # Code references
         st.subheader("📖 Relevant IBC Sections")
@@ -1110,51 +1208,48 @@ def main():
         refs_col1, refs_col2 = st.columns(2)
         
         with refs_col1:
-            st.markdown(f"**[{CODE_REFERENCES['occupant_load']['section']}]({CODE_REFERENCES['occupant_load']['link']})** - {CODE_REFERENCES['occupant_load']['description']}")
-            st.markdown(f"**[{CODE_REFERENCES['egress_width']['section']}]({CODE_REFERENCES['egress_width']['link']})** - {CODE_REFERENCES['egress_width']['description']}")
+            st.markdown(f"{CODE_REFERENCE_MD['occupant_load']}\n\n{CODE_REFERENCE_MD['egress_width']}")
         
         with refs_col2:
             if results.get('door_width'):
-                st.markdown(f"**[{CODE_REFERENCES['exit_access']['section']}]({CODE_REFERENCES['exit_access']['link']})** - {CODE_REFERENCES['exit_access']['description']}")
-                st.markdown(f"**[{CODE_REFERENCES['door_width']['section']}]({CODE_REFERENCES['door_width']['link']})** - {CODE_REFERENCES['door_width']['description']}")
+                st.markdown(f"{CODE_REFERENCE_MD['exit_access']}\n\n{CODE_REFERENCE_MD['door_width']}")
         
         # Jurisdiction notice
         st.info(generate_code_notice(results['inputs']['state'], results['inputs'].get('jurisdiction')))
         
         # Calculation summary
         with st.expander("📊 Detailed Calculation Summary (Copy/Export)", expanded=False):
-            summary = generate_calculation_summary(results['inputs'], results)
+            summary = generate_calculation_summary(
+                results_key,
+                results,
+                st.session_state.current_units,
+                st.session_state.project_name,
+                building_index + 1,
+                len(buildings)
+            )
             st.text_area(
                 "Complete Calculation Summary:",
                 value=summary,
                 height=500,
-                help="Copy this summary for your records, reports, or permit applications"
+                help="Copy this summary for your records, reports, or permit applications",
+                # Keyed on every summary argument: a keyed text_area ignores later changes to value
+                key=(
+                    f"summary_{results_key}_{st.session_state.current_units}_"
+                    f"{st.session_state.project_name}_{building_index + 1}_{len(buildings)}"
+                )
             )
             
             # Download summary
+            # Stamp from the calculation itself so the file name is stable across reruns
+            calculated_at = datetime.fromisoformat(results['calculated_at']) if results.get('calculated_at') else datetime.now()
+            file_stamp = calculated_at.strftime('%Y%m%d_%H%M%S')
             st.download_button(
                 label="📥 Download Summary as Text File",
                 data=summary,
-                file_name=f"egress_summary_{st.session_state.project_name or 'project'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                mime="text/plain"
+                file_name=f"egress_summary_{st.session_state.project_name or 'project'}_{file_stamp}.txt",
+                mime="text/plain",
+                key="download_summary"
             )
-    
-    # Footer
-    st.divider()
-    footer_col1, footer_col2 = st.columns([2, 1])
-    
-    with footer_col1:
-        st.markdown("""
-        **⚠️ Disclaimer:** This calculator is for preliminary design purposes only. 
-        Always consult with local authorities and verify current code requirements before finalizing any design.
-        """)
-    
-    with footer_col2:
-        st.markdown(f"""
-        **Egress Calculator v{__version__}**  
-        Built: {__build_date__}  
-        [📚 GitHub Repository](https://github.com/hanialnaber/egress-calculator)
-        """)
 
 if __name__ == "__main__":
     main()
@@ -9,54 +9,67 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+# Version fields rewritten in app.py and VERSION.md; each file is scanned once,
+# with the matching group name selecting the replacement
+_APP_FIELDS_RE = re.compile(r'(?P<version>__version__ = "[^"]*")|(?P<build_date>__build_date__ = "[^"]*")')
+_VERSION_MD_FIELDS_RE = re.compile(r'(?P<version>## Current Version: [^\n]*)|(?P<release_date>\*\*Release Date:\*\* [^\n]*)')
+
+# __version__ and __build_date__ sit near the top of app.py, so a no-op run
+# only needs to read this many characters
+_APP_HEADER_CHARS = 4096
+
 def update_version(new_version: str, description: str = ""):
     """Update version across all files"""
     
+    # Both files get the same release timestamp
+    now = datetime.now()
+    
     # Update app.py
     app_file = Path("app.py")
     if app_file.exists():
-        content = app_file.read_text()
+        # Update version and build date
+        today = now.strftime("%Y-%m-%d")
+        replacements = {
+            'version': f'__version__ = "{new_version}"',
+            'build_date': f'__build_date__ = "{today}"'
+        }
         
-        # Update version
-        content = re.sub(
-            r'__version__ = "[^"]*"',
-            f'__version__ = "{new_version}"',
-            content
-        )
+        # Check the header first so no-op runs avoid reading the whole file
+        with app_file.open() as f:
+            header = f.read(_APP_HEADER_CHARS)
+        current_fields = {match.lastgroup: match.group() for match in _APP_FIELDS_RE.finditer(header)}
         
-        # Update build date
-        today = datetime.now().strftime("%Y-%m-%d")
-        content = re.sub(
-            r'__build_date__ = "[^"]*"',
-            f'__build_date__ = "{today}"',
-            content
-        )
-        
-        app_file.write_text(content)
-        print(f"✅ Updated app.py to version {new_version}")
+        if current_fields == replacements:
+            print(f"ℹ️ app.py already at version {new_version}")
+        else:
+            original = app_file.read_text()
+            content = _APP_FIELDS_RE.sub(lambda match: replacements[match.lastgroup], original)
+            
+            # Skip the write (and mtime bump) when nothing changed
+            if content != original:
+                app_file.write_text(content)
+                print(f"✅ Updated app.py to version {new_version}")
+            else:
+                print(f"ℹ️ app.py already at version {new_version}")
     
     # Update VERSION.md
     version_file = Path("VERSION.md")
     if version_file.exists():
-        content = version_file.read_text()
-        
-        # Update current version line
-        content = re.sub(
-            r'## Current Version: [^\n]*',
-            f'## Current Version: {new_version}',
-            content
-        )
+        original = version_file.read_text()
         
-        # Update release date
-        today = datetime.now().strftime("%B %d, %Y")
-        content = re.sub(
-            r'\*\*Release Date:\*\* [^\n]*',
-            f'**Release Date:** {today}',
-            content
-        )
+        # Update current version line and release date
+        today = now.strftime("%B %d, %Y")
+        replacements = {
+            'version': f'## Current Version: {new_version}',
+            'release_date': f'**Release Date:** {today}'
+        }
+        content = _VERSION_MD_FIELDS_RE.sub(lambda match: replacements[match.lastgroup], original)
         
-        version_file.write_text(content)
-        print(f"✅ Updated VERSION.md to version {new_version}")
+        if content != original:
+            version_file.write_text(content)
+            print(f"✅ Updated VERSION.md to version {new_version}")
+        else:
+            print(f"ℹ️ VERSION.md already at version {new_version}")
     
     print(f"""
 🎉 Version updated to {new_version}